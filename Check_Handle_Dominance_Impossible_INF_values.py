@@ -1,24 +1,146 @@
+import io
 import os
+import json
+import re
+import mmap
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 from collections import Counter, defaultdict
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import redirect_stdout
+from functools import partial
+
+from Cleaning_Output import ROUND_TRIP, impute_inf_batch, write_batches, write_csv_header, write_csv_rows
 
 # --- GLOBAL CONFIGURATION VARIABLES ---
 INPUT_FOLDER = "Downscale_Csv_2018"
+OUTPUT_FOLDER = "Cleaned_Files_2018"  # Saved inf counts; the cleaned files stay next to their inputs
 CHUNK_SIZE = 1_000_000
 DOMINANCE_RANGES = [
     (0.95, 1.01, "95-100%"), (0.90, 0.95, "90-95%"),
     (0.80, 0.90, "80-90%"), (0.70, 0.80, "70-80%"),
     (0.60, 0.70, "60-70%"), (0.50, 0.60, "50-60%"),
 ]
+# The ranges are contiguous, so a ratio's bucket is one binary search over these edges
+DOMINANCE_EDGES = np.array(sorted(low for low, _, _ in DOMINANCE_RANGES)
+                           + [max(high for _, high, _ in DOMINANCE_RANGES)])
+DOMINANCE_LABELS = [label for _, _, label in sorted(DOMINANCE_RANGES)]
+TOP_K = 50  # Most frequent values listed per column in the dominance report
 NEVER_NEGATIVE_KEYWORDS = [
     'port', 'duration', 'count', 'bytes', 'size', 'rate', 'percentage',
     'variance', 'std', 'total', 'max', 'min', 'median', 'mode', 'mean',
     'iat', 'active', 'idle', 'bulk', 'handshake', 'subflow'
 ]
 CAN_BE_NEGATIVE_KEYWORDS = ['skew', 'cov', 'delta']
+# Each keyword list compiled into one pattern, so a column name is scanned once per list
+NEVER_NEGATIVE_PATTERN = re.compile('|'.join(map(re.escape, NEVER_NEGATIVE_KEYWORDS)))
+CAN_BE_NEGATIVE_PATTERN = re.compile('|'.join(map(re.escape, CAN_BE_NEGATIVE_KEYWORDS)))
 PORT_COLUMNS = ['src_port', 'dst_port']
 INF_THRESHOLD = 0.30
+OUTPUT_SUFFIXES = ("_validated.csv", "_cleaned.csv", "_imputed.csv")  # Files this script wrote itself
+OUTPUT_FORMAT = "csv"  # Task 3 output files: "csv", or "parquet" for Snappy-compressed Parquet
+MAX_WORKERS = 4  # Files processed in parallel; Task 2 loads each whole CSV, so lower this if RAM is tight
+ARROW_BLOCK_SIZE = 64 << 20  # Bytes per block for the multithreaded Arrow CSV parser
+# Byte ranges of one file parsed at the same time. Each of the MAX_WORKERS processes
+# gets its share of the cores, so the pools together keep one thread per core
+PARSE_THREADS = max(1, (os.cpu_count() or 1) // MAX_WORKERS)
+
+
+# ==============================================================================
+# HELPER FUNCTIONS
+# ==============================================================================
+def is_column_never_negative(col):
+    """Decides from the column name whether its values can never be negative."""
+    lower = col.lower()
+    return NEVER_NEGATIVE_PATTERN.search(lower) is not None and CAN_BE_NEGATIVE_PATTERN.search(lower) is None
+
+
+def iter_csv_batches(file_path, convert_options=None):
+    """Streams a CSV as Arrow RecordBatches using the multithreaded Arrow parser."""
+    reader = pacsv.open_csv(file_path,
+                            read_options=pacsv.ReadOptions(block_size=ARROW_BLOCK_SIZE, use_threads=True),
+                            convert_options=convert_options)
+    for batch in reader:
+        yield batch
+
+
+def iter_csv_ranges(file_path, convert_options=None):
+    """Parses a CSV as newline-aligned byte ranges on a thread pool, yielding tables in file order.
+
+    Each range infers its own column types, so callers must not assume one schema
+    across tables. Assumes no newlines inside quoted values (true for flow CSVs).
+    """
+    if os.path.getsize(file_path) == 0:
+        return
+    with open(file_path, 'rb') as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        header_end = mm.find(b'\n') + 1 or len(mm)
+        header = mm[:header_end].rstrip(b'\r\n') + b'\n'
+        column_names = pacsv.read_csv(pa.BufferReader(header)).column_names
+        read_options = pacsv.ReadOptions(column_names=column_names, use_threads=False)
+
+        def parse(start, end):
+            return pacsv.read_csv(pa.BufferReader(mm[start:end]),
+                                  read_options=read_options, convert_options=convert_options)
+
+        with ThreadPoolExecutor(max_workers=PARSE_THREADS) as executor:
+            pending = deque()  # At most PARSE_THREADS ranges in flight, to bound memory
+            start = header_end
+            while start < len(mm):
+                end = mm.find(b'\n', min(start + ARROW_BLOCK_SIZE, len(mm)))
+                end = len(mm) if end == -1 else end + 1
+                pending.append(executor.submit(parse, start, end))
+                start = end
+                if len(pending) >= PARSE_THREADS:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+
+def iter_file_batches(file_path, columns=None, as_text=False):
+    """Streams a CSV or Parquet file as Arrow RecordBatches, optionally only the given columns.
+
+    as_text reads every CSV column as a string, for files whose column types change part way through.
+    """
+    if file_path.endswith(".parquet"):
+        yield from pq.ParquetFile(file_path).iter_batches(columns=columns)
+        return
+    convert_options = pacsv.ConvertOptions(include_columns=columns or [])
+    if as_text:
+        names = columns or pd.read_csv(file_path, nrows=0).columns
+        convert_options.column_types = {col: pa.string() for col in names}
+    yield from iter_csv_batches(file_path, convert_options)
+
+
+def read_columns(file_path, columns):
+    """Reads whole columns of a CSV or Parquet file into a dict of pandas Series.
+
+    CSVs go through iter_csv_ranges, so the file is memory-mapped and parsed on every
+    core. Each range infers its own types, so a column can come back as text when its
+    ranges disagree.
+    """
+    if file_path.endswith(".parquet"):
+        frame = pd.read_parquet(file_path, columns=columns)
+        return {col: frame[col] for col in columns}
+    tables = list(iter_csv_ranges(file_path, pacsv.ConvertOptions(include_columns=columns)))
+    return {col: pd.concat([table.column(col).to_pandas() for table in tables], ignore_index=True)
+            for col in columns}
+
+
+def write_output(file_path, output_path, columns=None, transform=None):
+    """Streams a file into an OUTPUT_FORMAT file, optionally passing each batch through transform.
+
+    Both writers need one schema for the whole file, so a CSV with a column that changes
+    type later (e.g. a repeated header row) is read again with every column as text.
+    """
+    transform = transform or (lambda batch: batch)
+    try:
+        write_batches(map(transform, iter_file_batches(file_path, columns)), output_path)
+    except pa.ArrowInvalid:
+        write_batches(map(transform, iter_file_batches(file_path, columns, as_text=True)), output_path)
 
 
 # ==============================================================================
@@ -31,32 +153,57 @@ def generate_dominance_report(file_path):
     col_counters = defaultdict(Counter)
     total_counts = Counter()
     label_counter = Counter()
-    col_value_label_counter = defaultdict(lambda: defaultdict(Counter))
+    value_label_counter = Counter()  # (column, value, label) -> count
 
     try:
         # (Analysis phase is unchanged)
-        for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE, dtype=str, low_memory=False):
-            labels = chunk.get("Label") or chunk.get("label")
-            if labels is not None:
-                label_counter.update(labels.dropna())
+        # Every column is read as text so values are reported exactly as written.
+        # Dictionary encoding stores each distinct value once plus int32 indices, and
+        # arrives in pandas as a categorical without a Python str per cell.
+        columns = pd.read_csv(file_path, nrows=0).columns
+        text_type = pa.dictionary(pa.int32(), pa.string())
+        convert_options = pacsv.ConvertOptions(column_types={c: text_type for c in columns},
+                                               strings_can_be_null=True)
+        for batch in iter_csv_ranges(file_path, convert_options):
+            # value_counts and groupby hash the small integer codes, not the strings
+            chunk = batch.to_pandas()
+            label_col = next((c for c in ("Label", "label") if c in chunk.columns), None)
+            if label_col is not None:
+                labels = chunk[label_col]
+                label_counter.update(labels.value_counts().to_dict())
+                label_codes = labels.cat.codes.to_numpy()
+                label_names = labels.cat.categories
             for col in chunk.columns:
-                values = chunk[col].dropna()
-                col_counters[col].update(values)
-                total_counts[col] += len(values)
-                if labels is not None and col.lower() != "label":
-                    for v, lbl in zip(chunk[col], labels):
-                        if pd.notna(v) and pd.notna(lbl):
-                            col_value_label_counter[col][v][lbl] += 1
+                # value_counts does the counting in C instead of a per-row Python loop
+                values = chunk[col].value_counts()
+                col_counters[col].update(values.to_dict())
+                total_counts[col] += int(values.sum())
+                if label_col is not None and col.lower() != "label":
+                    # Each (value, label) pair of categorical codes becomes one integer, so a
+                    # single bincount tallies every pair; code -1 marks a missing value
+                    value_codes = chunk[col].cat.codes.to_numpy()
+                    valid = (value_codes >= 0) & (label_codes >= 0)
+                    pair_counts = np.bincount(value_codes[valid].astype(np.int64) * len(label_names)
+                                              + label_codes[valid])
+                    present = np.flatnonzero(pair_counts)
+                    pair_values = chunk[col].cat.categories[present // len(label_names)]
+                    pair_labels = label_names[present % len(label_names)]
+                    value_label_counter.update({(col, v, lbl): c for v, lbl, c in
+                                                zip(pair_values, pair_labels, pair_counts[present].tolist())})
+
+        # Group the flat counter by (column, value) once, only for the report
+        label_breakdowns = defaultdict(Counter)
+        for (col, val, lbl), c in value_label_counter.items():
+            label_breakdowns[(col, val)][lbl] = c
 
         bucketed = {label: [] for _, _, label in DOMINANCE_RANGES}
         for col, counts in col_counters.items():
             if total_counts[col] == 0: continue
             _, most_common_count = counts.most_common(1)[0]
             ratio = most_common_count / total_counts[col]
-            for low, high, label in DOMINANCE_RANGES:
-                if low <= ratio < high:
-                    bucketed[label].append((col, counts, total_counts[col]))
-                    break
+            idx = np.searchsorted(DOMINANCE_EDGES, ratio, side='right') - 1
+            if 0 <= idx < len(DOMINANCE_LABELS):
+                bucketed[DOMINANCE_LABELS[idx]].append((col, counts, total_counts[col]))
 
         # --- MODIFICATION: Report is now printed to terminal AND saved to file ---
         report_path = f"{os.path.splitext(file_path)[0]}_dominance_report.txt"
@@ -95,13 +242,14 @@ def generate_dominance_report(file_path):
                         f.write(col_header + "\n")
                         print(col_header)
 
-                        for val, count in counts.most_common():
+                        # most_common(n) keeps a heap of n items instead of sorting every value
+                        for val, count in counts.most_common(TOP_K):
                             ratio = count / total
 
                             # Build the line first
                             line_to_output = f"  Value '{val}': {count:,} ({ratio * 100:.2f}%)"
-                            if val in col_value_label_counter.get(col, {}):
-                                lbl_counts = col_value_label_counter[col][val]
+                            if (col, val) in label_breakdowns:
+                                lbl_counts = label_breakdowns[(col, val)]
                                 breakdown = ", ".join(f"{lbl}: {c:,}" for lbl, c in lbl_counts.most_common())
                                 line_to_output += f" -> Labels: [{breakdown}]"
 
@@ -109,6 +257,11 @@ def generate_dominance_report(file_path):
                             f.write(line_to_output + "\n")
                             print(line_to_output)
 
+                        if len(counts) > TOP_K:
+                            more_text = f"  ... and {len(counts) - TOP_K:,} more"
+                            f.write(more_text + "\n")
+                            print(more_text)
+
         print(f"\nReport also saved to {report_path}")
 
     except Exception as e:
@@ -122,7 +275,13 @@ def run_data_validation(file_path):
     """Loads a CSV and runs the full validation and cleaning pipeline."""
     print(f"\nValidating and Cleaning: {os.path.basename(file_path)}")
     try:
-        df = pd.concat([chunk for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE)])
+        # Arrow parses the file on all cores and hands the table to pandas without
+        # the extra copy that concatenating pandas chunks used to cost.
+        table = pacsv.read_csv(file_path,
+                               read_options=pacsv.ReadOptions(block_size=ARROW_BLOCK_SIZE, use_threads=True),
+                               convert_options=pacsv.ConvertOptions(strings_can_be_null=True))
+        df = table.to_pandas(self_destruct=True, split_blocks=True)
+        del table
         print(f"Loaded {len(df)} rows.")
         results = {'negative_issues': {}, 'port_issues': {}, 'percentage_issues': {}}
         if 'Label' in df.columns and 'label' not in df.columns:
@@ -130,31 +289,48 @@ def run_data_validation(file_path):
         if 'label' not in df.columns:
             print("Warning: 'label' column not found.")
             df['label'] = 'Unknown'
-        for col in df.columns:
-            if any(kw in col.lower() for kw in CAN_BE_NEGATIVE_KEYWORDS): continue
-            if any(kw in col.lower() for kw in NEVER_NEGATIVE_KEYWORDS):
-                numeric_col = pd.to_numeric(df[col], errors='coerce')
-                if (numeric_col < 0).sum() > 0:
-                    mask = numeric_col < 0
-                    results['negative_issues'][col] = {'count': mask.sum(), 'rows': list(df[mask].index),
-                                                       'labels': df.loc[mask, 'label'].value_counts().to_dict()}
-        for col in PORT_COLUMNS:
-            if col in df.columns:
-                numeric_col = pd.to_numeric(df[col], errors='coerce')
-                if (~numeric_col.between(0, 65535)).sum() > 0:
-                    mask = ~numeric_col.between(0, 65535)
-                    results['port_issues'][col] = {'count': mask.sum(), 'rows': list(df[mask].index),
-                                                   'labels': df.loc[mask, 'label'].value_counts().to_dict()}
-        invalid_indices = set()
-        for group in results.values():
-            for info in group.values():
-                invalid_indices.update(info['rows'])
-        if not invalid_indices:
+        never_neg_cols = [col for col in df.columns if is_column_never_negative(col)]
+        port_cols = [col for col in PORT_COLUMNS if col in df.columns]
+
+        # One pass over the checked columns: each is converted to numbers once and every
+        # check that applies to it writes its column of the mask straight away.
+        # Arrow's parser already typed the numeric columns, so only columns it kept
+        # as text (stray strings in a numeric field) go through pd.to_numeric.
+        neg_pos = {col: j for j, col in enumerate(never_neg_cols)}
+        port_pos = {col: j for j, col in enumerate(port_cols)}
+        neg_mask = np.zeros((len(df), len(never_neg_cols)), dtype=bool, order='F')
+        port_mask = np.zeros((len(df), len(port_cols)), dtype=bool, order='F')
+        for col in dict.fromkeys(never_neg_cols + port_cols):
+            values = df[col]
+            if not pd.api.types.is_numeric_dtype(values):
+                values = pd.to_numeric(values, errors='coerce')
+            values = values.to_numpy(dtype=np.float64)
+            if col in neg_pos:
+                neg_mask[:, neg_pos[col]] = values < 0
+            if col in port_pos:
+                # NaN ports count as invalid, as before
+                port_mask[:, port_pos[col]] = ~((values >= 0) & (values <= 65535))
+
+        invalid_row_mask = neg_mask.any(axis=1) | port_mask.any(axis=1)
+
+        label_codes, label_names = pd.factorize(df['label'])
+        for issue_key, cols, mask in (('negative_issues', never_neg_cols, neg_mask),
+                                      ('port_issues', port_cols, port_mask)):
+            # Only counts are kept per column; the rows themselves live in invalid_row_mask
+            col_counts = mask.sum(axis=0)
+            for j in np.flatnonzero(col_counts):
+                codes = label_codes[mask[:, j]]
+                label_tally = np.bincount(codes[codes >= 0], minlength=len(label_names))
+                results[issue_key][cols[j]] = {
+                    'count': int(col_counts[j]),
+                    'labels': {label_names[k]: int(label_tally[k]) for k in np.flatnonzero(label_tally)}}
+        invalid_count = int(invalid_row_mask.sum())
+        if not invalid_count:
             print("\nNo invalid rows to clean.")
             return
-        print(f"\nFound {len(invalid_indices)} unique rows with invalid values.")
+        print(f"\nFound {invalid_count} unique rows with invalid values.")
         if input("Remove invalid rows and save new file? (y/n): ").lower() == 'y':
-            df_clean = df.drop(index=list(invalid_indices)).copy()
+            df_clean = df[~invalid_row_mask]
             clean_filename = f"{os.path.splitext(os.path.basename(file_path))[0]}_validated.csv"
             output_path = os.path.join(os.path.dirname(file_path), clean_filename)
             df_clean.to_csv(output_path, index=False)
@@ -168,16 +344,109 @@ def run_data_validation(file_path):
 # ==============================================================================
 # TASK 3: 'INF' COLUMN REMOVAL LOGIC
 # ==============================================================================
-def run_inf_column_removal(file_path):
-    """Analyzes and removes columns with a high percentage of 'inf' values."""
+def inf_counts_path(file_path):
+    """JSON file in OUTPUT_FOLDER where count_inf_values saves its result for later runs."""
+    return os.path.join(OUTPUT_FOLDER, f"{os.path.splitext(os.path.basename(file_path))[0]}_inf_counts.json")
+
+
+def load_inf_counts(file_path):
+    """Returns the (inf_counts, total_rows) saved for a file, or None if it changed since."""
+    try:
+        with open(inf_counts_path(file_path)) as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return None
+    stat = os.stat(file_path)
+    if saved.get('key') != [stat.st_size, stat.st_mtime_ns]:
+        return None
+    return pd.Series(saved['inf_counts'], index=saved['columns'], dtype=np.int64), saved['total_rows']
+
+
+def save_inf_counts(file_path, inf_counts, total_rows):
+    """Saves a count_inf_values result, keyed by the file's size and modification time."""
+    stat = os.stat(file_path)
+    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+    with open(inf_counts_path(file_path), 'w') as f:
+        json.dump({'key': [stat.st_size, stat.st_mtime_ns], 'columns': list(inf_counts.index),
+                   'inf_counts': inf_counts.tolist(), 'total_rows': total_rows}, f)
+
+
+def count_inf_values(file_path, reuse=False):
+    """Counts the 'inf' values in every column with one parallel pass over the CSV.
+
+    With reuse=True a result saved by an earlier run is returned while the file is
+    unchanged, and a new result is saved for the next run.
+    """
+    saved = load_inf_counts(file_path) if reuse else None
+    if saved is not None:
+        return saved
+    if file_path.endswith(".parquet"):
+        tables = (pa.Table.from_batches([batch]) for batch in iter_file_batches(file_path))
+    else:
+        tables = iter_csv_ranges(file_path)
+    inf_counts = None
+    total_rows = 0
+    for table in tables:
+        if inf_counts is None:
+            columns = table.column_names
+            inf_counts = np.zeros(len(columns), dtype=np.int64)
+        for j, column in enumerate(table.columns):
+            if pa.types.is_floating(column.type):
+                # NumPy views of the chunks (nulls read as NaN) with count_nonzero beat
+                # is_inf + sum, which builds a mask and then reduces it in a second kernel
+                inf_counts[j] += sum(np.count_nonzero(np.isinf(chunk.to_numpy(zero_copy_only=False)))
+                                     for chunk in column.chunks)
+            elif pa.types.is_string(column.type):
+                # Text columns can still hold values like 'inf' next to non-numbers
+                numeric = pd.to_numeric(column.to_pandas(), errors='coerce')
+                inf_counts[j] += np.count_nonzero(np.isinf(numeric.to_numpy()))
+        total_rows += table.num_rows
+    inf_counts = pd.Series(dtype=int) if inf_counts is None else pd.Series(inf_counts, index=columns)
+    if reuse:
+        save_inf_counts(file_path, inf_counts, total_rows)
+    return inf_counts, total_rows
+
+
+def write_csv_without_columns(file_path, output_csv_path, columns_to_delete):
+    """Streams a copy of the CSV without the given columns, parsed by Arrow and written by pandas."""
+    # Deleted columns are left out at parse time, so they are never converted or held in memory
+    keep_columns = [col for col in pd.read_csv(file_path, nrows=0).columns if col not in columns_to_delete]
+    try:
+        with open(output_csv_path, 'wb') as sink:
+            write_csv_header(sink, keep_columns)
+            for batch in iter_csv_batches(file_path, pacsv.ConvertOptions(include_columns=keep_columns)):
+                write_csv_rows(batch, sink)
+    except pa.ArrowInvalid:
+        # Arrow's streaming reader fixes column types from the first block, so a column
+        # that changes type later (e.g. a repeated header row) needs the pandas path
+        _write_csv_without_columns_pandas(file_path, output_csv_path, columns_to_delete)
+
+
+def _write_csv_without_columns_pandas(file_path, output_csv_path, columns_to_delete):
+    """Fallback for write_csv_without_columns on files with mixed-type columns."""
+    is_first_chunk = True
+    # Deleted columns are skipped by the parser instead of being dropped from each chunk
+    for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE, usecols=lambda col: col not in columns_to_delete,
+                             low_memory=False, **ROUND_TRIP):
+        if is_first_chunk:
+            chunk.to_csv(output_csv_path, index=False, mode='w')
+            is_first_chunk = False
+        else:
+            chunk.to_csv(output_csv_path, index=False, mode='a', header=False)
+
+
+def run_inf_column_removal(file_path, inf_analysis=None):
+    """Analyzes and removes columns with a high percentage of 'inf' values.
+
+    inf_analysis can hold a precomputed (inf_counts, total_rows) result from
+    count_inf_values, in which case Phase 1 does not read the file again.
+    """
     print(f"\n--- Processing file for 'inf' columns: {os.path.basename(file_path)} ---")
     print(f"Phase 1: Analyzing columns (Threshold: {INF_THRESHOLD:.0%})...")
-    inf_counts = pd.Series(dtype=int)
-    total_rows = 0
     try:
-        for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE, low_memory=False):
-            total_rows += len(chunk)
-            inf_counts = inf_counts.add(chunk.apply(pd.to_numeric, errors='coerce').pipe(np.isinf).sum(), fill_value=0)
+        if inf_analysis is None:
+            inf_analysis = count_inf_values(file_path, reuse=True)
+        inf_counts, total_rows = inf_analysis
         if total_rows == 0:
             print("File is empty. Skipping.")
             return
@@ -205,17 +474,15 @@ def run_inf_column_removal(file_path):
 
     print("\nPhase 2: Deleting columns and creating new file...")
     base_name = os.path.splitext(os.path.basename(file_path))[0]
-    output_filename = f"{base_name}_cleaned.csv"
-    output_csv_path = os.path.join(os.path.dirname(file_path), output_filename)
+    output_filename = f"{base_name}_cleaned.{OUTPUT_FORMAT}"
+    output_path = os.path.join(os.path.dirname(file_path), output_filename)
     try:
-        is_first_chunk = True
-        for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE, low_memory=False):
-            chunk.drop(columns=columns_to_delete, inplace=True, errors='ignore')
-            if is_first_chunk:
-                chunk.to_csv(output_csv_path, index=False, mode='w')
-                is_first_chunk = False
-            else:
-                chunk.to_csv(output_csv_path, index=False, mode='a', header=False)
+        if OUTPUT_FORMAT == "parquet":
+            keep_columns = [col for col in pd.read_csv(file_path, nrows=0).columns
+                            if col not in columns_to_delete]
+            write_output(file_path, output_path, columns=keep_columns)
+        else:
+            write_csv_without_columns(file_path, output_path, columns_to_delete)
         print(f"Successfully created '{output_filename}'")
 
         print("\n--- Next Steps for the Cleaned File ---")
@@ -226,9 +493,9 @@ def run_inf_column_removal(file_path):
         choice = input("Enter your choice (1, 2, or 3): ")
 
         if choice == '1':
-            report_remaining_inf(output_csv_path)
+            report_remaining_inf(output_path)
         elif choice == '2':
-            run_inf_imputation(output_csv_path)
+            run_inf_imputation(output_path)
         else:
             print("Continuing to the next file.")
 
@@ -242,12 +509,8 @@ def run_inf_column_removal(file_path):
 def report_remaining_inf(file_path):
     """A simple analysis pass to report, but not act on, 'inf' values."""
     print(f"\n--- Re-analyzing for remaining 'inf' in {os.path.basename(file_path)} ---")
-    inf_counts = pd.Series(dtype=int)
-    total_rows = 0
     try:
-        for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE, low_memory=False):
-            total_rows += len(chunk)
-            inf_counts = inf_counts.add(chunk.apply(pd.to_numeric, errors='coerce').pipe(np.isinf).sum(), fill_value=0)
+        inf_counts, total_rows = count_inf_values(file_path)
         if total_rows == 0: return
 
         inf_percentages = inf_counts / total_rows
@@ -272,40 +535,40 @@ def run_inf_imputation(file_path):
     medians = {}
     try:
         print("Phase 1: Calculating medians for columns with 'inf' values...")
-        inf_counts = pd.Series(dtype=int)
-        for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE, low_memory=False):
-            inf_counts = inf_counts.add(chunk.apply(pd.to_numeric, errors='coerce').pipe(np.isinf).sum(), fill_value=0)
+        inf_counts, _ = count_inf_values(file_path)
         cols_to_process = inf_counts[inf_counts > 0].index.tolist()
 
         if not cols_to_process:
             print("No 'inf' values found to impute.")
             return
 
+        # All affected columns come from one projected read instead of one read per column
+        inf_columns = read_columns(file_path, cols_to_process)
         for col in cols_to_process:
-            series = pd.read_csv(file_path, usecols=[col], low_memory=False).squeeze("columns")
-            median_val = pd.to_numeric(series, errors='coerce').replace([np.inf, -np.inf], np.nan).median()
+            median_val = pd.to_numeric(inf_columns[col], errors='coerce').replace([np.inf, -np.inf], np.nan).median()
             medians[col] = median_val
             print(f"  - Column '{col}': Median is {median_val}")
+        del inf_columns
 
         print("\nPhase 2: Replacing 'inf' values and saving new file...")
         base_name = os.path.splitext(os.path.basename(file_path))[0]
-        output_filename = f"{base_name}_imputed.csv"
-        output_csv_path = os.path.join(os.path.dirname(file_path), output_filename)
-        is_first_chunk = True
-        for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE, low_memory=False):
-            for col, median_val in medians.items():
-                if col in chunk.columns:
-                    chunk[col] = pd.to_numeric(chunk[col], errors='coerce').replace([np.inf, -np.inf], median_val)
-            if is_first_chunk:
-                chunk.to_csv(output_csv_path, index=False, mode='w')
-                is_first_chunk = False
-            else:
-                chunk.to_csv(output_csv_path, index=False, mode='a', header=False)
+        output_filename = f"{base_name}_imputed.{OUTPUT_FORMAT}"
+        output_path = os.path.join(os.path.dirname(file_path), output_filename)
+        # Arrow parses and writes on all cores; only the imputed columns pass through NumPy
+        write_output(file_path, output_path, transform=partial(impute_inf_batch, medians=medians))
         print(f"Successfully created '{output_filename}'")
     except Exception as e:
         print(f"Error during imputation: {e}")
 
 
+def run_captured(func, file_path):
+    """Runs func(file_path) in a worker process and returns what it printed."""
+    report = io.StringIO()
+    with redirect_stdout(report):
+        func(file_path)
+    return report.getvalue()
+
+
 # ==============================================================================
 # MAIN DRIVER
 # ==============================================================================
@@ -326,17 +589,33 @@ def main():
         print(f"Error: Input folder not found at '{INPUT_FOLDER}'")
         return
 
+    # scandir entries carry their path and file type, so no extra join or stat per file
+    with os.scandir(INPUT_FOLDER) as entries:
+        file_paths = [entry.path for entry in entries
+                      if entry.name.endswith(".csv") and not entry.name.endswith(OUTPUT_SUFFIXES) and entry.is_file()]
+
     print("\nStarting process...")
-    for filename in os.listdir(INPUT_FOLDER):
-        output_suffixes = ("_validated.csv", "_cleaned.csv", "_imputed.csv")
-        if filename.endswith(".csv") and not filename.endswith(output_suffixes):
-            file_path = os.path.join(INPUT_FOLDER, filename)
-            if choice == '1':
-                generate_dominance_report(file_path)
-            elif choice == '2':
-                run_data_validation(file_path)
-            elif choice == '3':
-                run_inf_column_removal(file_path)
+    if choice == '1':
+        # Files are independent, so the reports are built in a process pool; each comes
+        # back whole and in file order instead of interleaving with the others
+        with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            for report in executor.map(partial(run_captured, generate_dominance_report), file_paths):
+                print(report, end="")
+                print("-" * 60)
+    elif choice == '2':
+        # Each file's prompt follows its own invalid-row count, so files are validated one at a time
+        for file_path in file_paths:
+            run_data_validation(file_path)
+            print("-" * 60)
+    elif choice == '3':
+        # Only the read-heavy analysis runs in parallel; deletion and imputation are
+        # interactive and stay in this process, so workers never wait on stdin
+        with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            inf_futures = [executor.submit(count_inf_values, file_path, reuse=True) for file_path in file_paths]
+        for file_path, future in zip(file_paths, inf_futures):
+            # A failed analysis is retried in run_inf_column_removal, which reports the error
+            inf_analysis = future.result() if future.exception() is None else None
+            run_inf_column_removal(file_path, inf_analysis)
             print("-" * 60)
     print("\nAll files processed.")
 
@@ -1,13 +1,15 @@
 import os
+import numpy as np
 import pandas as pd
-from collections import Counter, defaultdict
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import math
 
 # CSV file path
 csv_file = "2017/Processed_Data_2017/Merged_Shuffled.csv"
 
-# Chunk size for large files
-chunk_size = 1_000_000
+# Bytes of CSV parsed per batch by the multithreaded Arrow reader
+block_size = 64 << 20
 
 
 # Helper function to classify a value's data type
@@ -39,27 +41,77 @@ def classify_value(val):
         return "string"
 
 
-# Use defaultdict(Counter) to store the counts of each data type per column
-col_type_counts = defaultdict(Counter)
+# Type names in code order for the vectorized classification below
+TYPE_NAMES = ["NaN", "inf", "integer", "float", "string"]
+TYPE_CODES = {name: code for code, name in enumerate(TYPE_NAMES)}
+
+
+def classify_column(series):
+    """
+    Classifies every value of a string column like classify_value. Returns the count
+    of each type code and the codes present, in the order they first appear.
+    """
+    raw_na = series.isna().to_numpy()
+    num = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64)
+    finite = np.isfinite(num)
+
+    # Default is 'string'; later assignments win, so NaN beats everything else
+    codes = np.full(len(series), TYPE_CODES["string"], dtype=np.int8)
+    codes[finite] = TYPE_CODES["float"]
+    codes[finite & (num == np.floor(num))] = TYPE_CODES["integer"]
+    codes[np.isinf(num)] = TYPE_CODES["inf"]
+    codes[raw_na] = TYPE_CODES["NaN"]
+
+    # Values pandas could not parse are usually text, but float() also accepts a few
+    # forms pandas does not (e.g. '+nan', '1_000'), so each distinct one is checked once
+    unparsed = np.isnan(num) & ~raw_na
+    if unparsed.any():
+        unparsed_values = series[unparsed]
+        value_codes = {val: TYPE_CODES[classify_value(val)] for val in unparsed_values.unique()}
+        codes[unparsed] = unparsed_values.map(value_codes).to_numpy()
+
+    return np.bincount(codes, minlength=len(TYPE_NAMES)), pd.unique(codes)
+
+
+# One row of type counts per column, filled once the header is known
+col_index = {}
+type_counts = None
+# Type codes per column in the order they first appear, so the summary lists them that way
+type_order = []
 
 print("Starting to process the CSV file to find critical errors...")
 
-# Read the large CSV file in chunks, forcing all data to be read as strings initially
-for i, chunk in enumerate(pd.read_csv(csv_file, chunksize=chunk_size, low_memory=False, dtype=str)):
+# Read the large CSV file in batches, forcing all data to be read as strings initially.
+# Arrow parses each block on all cores; '<NA>' and 'None' are added so the same
+# values count as missing as with pandas' dtype=str
+columns = pd.read_csv(csv_file, nrows=0).columns
+convert_options = pacsv.ConvertOptions(column_types={col: pa.string() for col in columns}, strings_can_be_null=True,
+                                       null_values=pacsv.ConvertOptions().null_values + ['<NA>', 'None'])
+reader = pacsv.open_csv(csv_file, read_options=pacsv.ReadOptions(block_size=block_size),
+                        convert_options=convert_options)
+for i, batch in enumerate(reader):
+    chunk = batch.to_pandas()
     print(f"Processing chunk {i + 1}...")
+    if type_counts is None:
+        col_index = {col: j for j, col in enumerate(chunk.columns)}
+        type_counts = np.zeros((len(col_index), len(TYPE_NAMES)), dtype=np.int64)
+        type_order = [[] for _ in col_index]
     # For each column in the current chunk...
     for col in chunk.columns:
-        # ...map the classify_value function to every item and update the counts
-        col_type_counts[col].update(chunk[col].map(classify_value))
+        # ...classify the whole column with vectorized checks and update the counts
+        j = col_index[col]
+        tally, seen = classify_column(chunk[col])
+        type_order[j].extend(code for code in seen if type_counts[j, code] == 0)
+        type_counts[j] += tally
 
 print("\n--- Analysis Complete ---")
 
 # Print a summary of columns that contain the critical 'string' or 'inf' types
 print("\nSummary of Columns with Critical Errors:\n")
-for col, counts in col_type_counts.items():
+for col, j in col_index.items():
     # MODIFIED LINE: Only report on columns containing 'string' or 'inf'
-    if 'string' in counts or 'inf' in counts:
+    if type_counts[j, TYPE_CODES["string"]] or type_counts[j, TYPE_CODES["inf"]]:
         print(f"Column: {col} (CRITICAL - mixed types found)")
-        for val_type, cnt in counts.items():
-            print(f"  {val_type} --- {cnt}")
+        for code in type_order[j]:
+            print(f"  {TYPE_NAMES[code]} --- {type_counts[j, code]}")
         print("-" * 40)
\ No newline at end of file
@@ -1,6 +1,11 @@
 import os
 import pandas as pd
-from collections import defaultdict
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from Cleaning_Output import ROUND_TRIP, write_csv_header, write_csv_rows
 
 # --- 1. Configuration ---
 # Set the folder where your original CSV files are located.
@@ -12,6 +17,16 @@ OUTPUT_FOLDER = "D_Cleaned_CSVs"
 # Define the number of rows to read at a time.
 CHUNK_SIZE = 1_000_000
 
+# Define the number of bytes the multithreaded Arrow reader parses per batch when analyzing.
+ARROW_BLOCK_SIZE = 64 << 20
+
+# Define how many unique values are tracked per column; a column past this is neither
+# constant nor low-variance, so it is skipped for the rest of the file.
+UNIQUE_VALUE_LIMIT = 1_000
+
+# Define how many files are analyzed at the same time; lower this if the disk is slow.
+MAX_WORKERS = 4
+
 
 # --- 2. Helper Functions ---
 
@@ -27,21 +42,95 @@ def get_user_yes_no(prompt):
             print("Invalid input. Please enter 'y' or 'n'.")
 
 
+def write_chunks(chunks, write):
+    """Calls write(chunk, is_first) for each chunk and returns how many were written.
+
+    Each chunk is written on a background thread while the next one is parsed; the CSV
+    readers and writers release the GIL for most of their work, so the two overlap.
+    At most one chunk waits for the writer, which caps the extra memory.
+    """
+    written = 0
+    pending = None
+    with ThreadPoolExecutor(max_workers=1) as writer:
+        for chunk in chunks:
+            if pending is not None:
+                pending.result()
+            pending = writer.submit(write, chunk, written == 0)
+            written += 1
+        if pending is not None:
+            pending.result()
+    return written
+
+
+def write_kept_columns(file_path, output_path, keep_columns):
+    """Streams a copy of the CSV with only the given columns to output_path."""
+    # Dropped columns are skipped at parse time; Arrow reads ahead on a background
+    # thread, so disk reads overlap with parsing the previous block
+    convert_options = pacsv.ConvertOptions(include_columns=keep_columns, strings_can_be_null=True,
+                                           null_values=pacsv.ConvertOptions().null_values + ['<NA>', 'None'])
+    try:
+        reader = pacsv.open_csv(file_path, read_options=pacsv.ReadOptions(block_size=ARROW_BLOCK_SIZE),
+                                convert_options=convert_options)
+        # Arrow parses the blocks; pandas formats the rows exactly like the fallback below
+        with open(output_path, 'wb') as sink:
+            write_csv_header(sink, reader.schema.names)
+            write_chunks(reader, lambda batch, is_first: write_csv_rows(batch, sink))
+    except pa.ArrowInvalid:
+        # Arrow's streaming reader fixes column types from the first block, so a column
+        # that changes type later is rewritten from the start with pandas
+        written = write_chunks(pd.read_csv(file_path, chunksize=CHUNK_SIZE, usecols=keep_columns, low_memory=False,
+                                           **ROUND_TRIP),
+                               lambda chunk, is_first: chunk.to_csv(output_path, index=False,
+                                                                    mode='w' if is_first else 'a', header=is_first))
+        if not written:
+            # A file with only a header still gets its header written
+            pd.DataFrame(columns=keep_columns).to_csv(output_path, index=False)
+
+
+def collect_unique_values(file_path):
+    """
+    Returns the distinct values of each column, in the order they first appear. Columns
+    with more than UNIQUE_VALUE_LIMIT values stop being tracked once they pass it.
+    """
+    col_unique_values = {}
+    saturated_cols = set()
+    # Every column is read as text, as with dtype=str; '<NA>' and 'None' are added so
+    # the same values count as missing as with pandas
+    columns = pd.read_csv(file_path, nrows=0).columns
+    convert_options = pacsv.ConvertOptions(column_types={col: pa.string() for col in columns},
+                                           strings_can_be_null=True,
+                                           null_values=pacsv.ConvertOptions().null_values + ['<NA>', 'None'])
+    reader = pacsv.open_csv(file_path, read_options=pacsv.ReadOptions(block_size=ARROW_BLOCK_SIZE),
+                            convert_options=convert_options)
+    for batch in reader:
+        # Distinct values stay in Arrow arrays and are merged with Arrow's hash kernel,
+        # so no Python string is created until the analysis is done
+        for col, column in zip(batch.schema.names, batch.columns):
+            if col in saturated_cols:
+                continue
+            values = pc.unique(column.drop_null())
+            if col in col_unique_values:
+                values = pc.unique(pa.concat_arrays([col_unique_values[col], values]))
+            col_unique_values[col] = values
+            if len(values) > UNIQUE_VALUE_LIMIT:
+                saturated_cols.add(col)
+    return {col: values.to_pylist() for col, values in col_unique_values.items()}
+
+
 # --- 3. Main Processing Function (No changes needed here) ---
 
-def analyze_and_clean_csv(file_path, output_path):
+def analyze_and_clean_csv(file_path, output_path, col_unique_values=None):
     """
     Analyzes a CSV for constant/low-variance columns and optionally removes them.
+    col_unique_values can hold a precomputed collect_unique_values result.
     """
     print("-" * 70)
     print(f"Processing file: {os.path.basename(file_path)}")
 
     try:
-        print("  Analyzing columns... (this may take a moment for large files)")
-        col_unique_values = defaultdict(set)
-        for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE, dtype=str, low_memory=False):
-            for col in chunk.columns:
-                col_unique_values[col].update(chunk[col].dropna().unique())
+        if col_unique_values is None:
+            print("  Analyzing columns... (this may take a moment for large files)")
+            col_unique_values = collect_unique_values(file_path)
         print("  Analysis complete.")
 
         columns_to_drop = []
@@ -59,7 +148,9 @@ def analyze_and_clean_csv(file_path, output_path):
             while True:
                 try:
                     threshold = int(input("    Enter the maximum number of unique values (e.g., 3): "))
-                    break
+                    if threshold <= UNIQUE_VALUE_LIMIT:
+                        break
+                    print(f"    Only up to {UNIQUE_VALUE_LIMIT} unique values are tracked. Please enter a smaller number.")
                 except ValueError:
                     print("    That wasn't a valid number. Please enter an integer.")
 
@@ -83,12 +174,8 @@ def analyze_and_clean_csv(file_path, output_path):
 
         if get_user_yes_no("Do you want to remove these columns and save a new, cleaned file?"):
             print(f"  Removing {len(final_drop_list)} columns and saving new file...")
-            chunk_iterator = pd.read_csv(file_path, chunksize=CHUNK_SIZE, low_memory=False)
-            first_chunk = next(chunk_iterator)
-            first_chunk.drop(columns=final_drop_list, errors="ignore").to_csv(output_path, index=False)
-            for chunk in chunk_iterator:
-                chunk.drop(columns=final_drop_list, errors="ignore").to_csv(output_path, mode='a', header=False,
-                                                                            index=False)
+            write_kept_columns(file_path, output_path,
+                               [col for col in col_unique_values if col not in final_drop_list])
             print(f"  Successfully saved cleaned file to: {output_path}")
         else:
             print("  Skipping file modification as requested.")
@@ -152,9 +239,15 @@ if __name__ == "__main__":
             # Process only the selected files
             print(f"\nBeginning processing for {len(files_to_process)} selected file(s)...")
             os.makedirs(OUTPUT_FOLDER, exist_ok=True)
-            for file_path in files_to_process:
-                output_file_path = os.path.join(OUTPUT_FOLDER, os.path.basename(file_path))
-                analyze_and_clean_csv(file_path, output_file_path)
+            # The read-only analyses run in parallel; each file's questions start as soon
+            # as its own analysis is done, while the others keep running
+            with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                futures = [executor.submit(collect_unique_values, file_path) for file_path in files_to_process]
+                for file_path, future in zip(files_to_process, futures):
+                    # A failed analysis is retried in analyze_and_clean_csv, which reports the error
+                    analysis = future.result() if future.exception() is None else None
+                    output_file_path = os.path.join(OUTPUT_FOLDER, os.path.basename(file_path))
+                    analyze_and_clean_csv(file_path, output_file_path, analysis)
 
             print("\n" + "-" * 70)
             print("All selected files have been processed.")
\ No newline at end of file
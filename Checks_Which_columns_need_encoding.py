@@ -1,12 +1,29 @@
 import os
 import pandas as pd
 import numpy as np
-from collections import Counter
+import pyarrow as pa
+import pyarrow.csv as pacsv
 
 # --- Configuration ---
 input_folder = "Downscale_Csv_2018"  # Folder containing CSVs
-chunk_size = 2_000_000  # Adjust based on memory
+block_size = 64 << 20  # Bytes of CSV parsed per batch by the multithreaded Arrow reader
 columns_to_check = ['delta_start', 'handshake_duration', 'label']
+# Text columns are held in Arrow string arrays, so .str.contains runs Arrow's compute
+# kernel instead of testing one Python string at a time
+arrow_string = pd.ArrowDtype(pa.string())
+# The scan only needs these columns, read as text; '<NA>' and 'None' are added so the
+# same values count as missing as with pandas
+scan_options = pacsv.ConvertOptions(include_columns=columns_to_check,
+                                    column_types={col: pa.string() for col in columns_to_check},
+                                    strings_can_be_null=True,
+                                    null_values=pacsv.ConvertOptions().null_values + ['<NA>', 'None'])
+
+
+def invalid_handshake(series):
+    """Boolean array marking values that contain 'not a complete handshake' in any case."""
+    # Missing values never match
+    return series.str.contains("not a complete handshake", case=False, regex=False, na=False).to_numpy()
+
 
 # --- Process each CSV in the input folder ---
 for file in os.listdir(input_folder):
@@ -19,51 +36,77 @@ for file in os.listdir(input_folder):
 
     print(f"\nScanning file: {csv_file}...")
 
-    both_valid_counter = Counter()
-    both_invalid_counter = Counter()
-    rows_to_remove = []
-
-    chunk_start_row = 0
+    # Labels in the order they first appear, mapped to their position in the counts below
+    label_index = {}
+    both_valid_counts = np.zeros(0, dtype=np.int64)
+    both_invalid_counts = np.zeros(0, dtype=np.int64)
+    # Label positions in the order each label first appears within the group, as the
+    # per-group Counters listed them
+    both_valid_order = {}
+    both_invalid_order = {}
+    rows_to_remove = 0
     # --- Phase 1: Scan and summarize ---
-    for chunk in pd.read_csv(csv_file, chunksize=chunk_size, low_memory=False, usecols=columns_to_check):
-        for idx, row in chunk.iterrows():
-            delta = row['delta_start']
-            handshake = row['handshake_duration']
-            label = row['label']
-
-            delta_invalid = isinstance(delta, str) and "not a complete handshake" in delta.lower()
-            handshake_invalid = isinstance(handshake, str) and "not a complete handshake" in handshake.lower()
-
-            if delta_invalid and handshake_invalid:
-                both_invalid_counter[label] += 1
-                rows_to_remove.append(chunk_start_row + idx)
-            elif not delta_invalid and not handshake_invalid:
-                both_valid_counter[label] += 1
-
-        chunk_start_row += len(chunk)
+    reader = pacsv.open_csv(csv_file, read_options=pacsv.ReadOptions(block_size=block_size),
+                            convert_options=scan_options)
+    for batch in reader:
+        chunk = batch.to_pandas(types_mapper={pa.string(): arrow_string}.get)
+        # One vectorized substring scan per column instead of a Python check per row;
+        # missing values never match, so they count as valid as before
+        delta_invalid = invalid_handshake(chunk['delta_start'])
+        handshake_invalid = invalid_handshake(chunk['handshake_duration'])
+        both_invalid = delta_invalid & handshake_invalid
+        both_valid = ~delta_invalid & ~handshake_invalid
+
+        # The batch's label codes are mapped onto one index for the whole file, so each
+        # group is counted with a single bincount; code -1 (missing) maps to the NaN slot
+        codes, uniques = pd.factorize(chunk['label'])
+        codes = np.array([label_index.setdefault(lbl, len(label_index)) for lbl in [*uniques, np.nan]])[codes]
+        n_labels = len(label_index)
+        both_invalid_counts = (np.pad(both_invalid_counts, (0, n_labels - len(both_invalid_counts)))
+                               + np.bincount(codes[both_invalid], minlength=n_labels))
+        both_valid_counts = (np.pad(both_valid_counts, (0, n_labels - len(both_valid_counts)))
+                             + np.bincount(codes[both_valid], minlength=n_labels))
+        for group, order in ((both_valid, both_valid_order), (both_invalid, both_invalid_order)):
+            group_codes, first_rows = np.unique(codes[group], return_index=True)
+            order.update(dict.fromkeys(group_codes[np.argsort(first_rows)].tolist()))
+        rows_to_remove += int(both_invalid.sum())
 
     # --- Summary ---
+    labels = list(label_index)
     print("\nSummary of rows:")
-    print(f"Both valid rows: {sum(both_valid_counter.values())}")
-    for lbl, cnt in both_valid_counter.items():
-        print(f"  Label '{lbl}': {cnt}")
+    print(f"Both valid rows: {both_valid_counts.sum()}")
+    for pos in both_valid_order:
+        print(f"  Label '{labels[pos]}': {both_valid_counts[pos]}")
 
-    print(f"\nBoth invalid rows: {sum(both_invalid_counter.values())}")
-    for lbl, cnt in both_invalid_counter.items():
-        print(f"  Label '{lbl}': {cnt}")
+    print(f"\nBoth invalid rows: {both_invalid_counts.sum()}")
+    for pos in both_invalid_order:
+        print(f"  Label '{labels[pos]}': {both_invalid_counts[pos]}")
 
     # --- Ask for deletion ---
     delete_confirm = input(
-        f"\nDo you want to delete the {len(rows_to_remove)} rows with invalid handshakes in '{file}'? (yes/no): ").lower()
+        f"\nDo you want to delete the {rows_to_remove} rows with invalid handshakes in '{file}'? (yes/no): ").lower()
 
     if delete_confirm in ['yes', 'y']:
         print("\nDeleting invalid rows and creating new CSV...")
         is_first_chunk = True
-        chunk_start_row = 0
 
-        for chunk in pd.read_csv(csv_file, chunksize=chunk_size, low_memory=False):
-            chunk_indices = np.arange(chunk_start_row, chunk_start_row + len(chunk))
-            mask = np.isin(chunk_indices, rows_to_remove, invert=True)
+        # Every column is kept as text, so rows are copied as written and no column can
+        # change type between blocks; the label repeats a handful of strings, so it is
+        # dictionary-encoded and arrives as a categorical
+        columns = pd.read_csv(csv_file, nrows=0).columns
+        clean_options = pacsv.ConvertOptions(
+            column_types={col: pa.dictionary(pa.int32(), pa.string()) if col == 'label' else pa.string()
+                          for col in columns},
+            strings_can_be_null=True, null_values=scan_options.null_values)
+        reader = pacsv.open_csv(csv_file, read_options=pacsv.ReadOptions(block_size=block_size),
+                                convert_options=clean_options)
+        for batch in reader:
+            chunk = batch.to_pandas(types_mapper={pa.string(): arrow_string}.get)
+            # The same check as the scan, so no row numbers are carried between the passes;
+            # the second column is only searched on rows the first one already flagged
+            flagged = np.flatnonzero(invalid_handshake(chunk['delta_start']))
+            mask = np.ones(len(chunk), dtype=bool)
+            mask[flagged[invalid_handshake(chunk['handshake_duration'].iloc[flagged])]] = False
             chunk_cleaned = chunk[mask]
 
             if is_first_chunk:
@@ -72,8 +115,6 @@ for file in os.listdir(input_folder):
             else:
                 chunk_cleaned.to_csv(output_csv, index=False, mode='a', header=False)
 
-            chunk_start_row += len(chunk)
-
         print(f"Cleaned CSV saved: {output_csv}")
 
     else:
@@ -1,13 +1,20 @@
+import io
 import os
 import pandas as pd
 from collections import Counter
-from sklearn.preprocessing import LabelEncoder
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from functools import partial
+from sklearn.neighbors import NearestNeighbors
 from imblearn.under_sampling import RandomUnderSampler
 from imblearn.over_sampling import SMOTE, BorderlineSMOTE, ADASYN
 
 # ===== CONFIGURATION =====
 INPUT_FOLDER = "Training_2018"
 OUTPUT_FOLDER = "Balanced_Training_2018"
+OUTPUT_FORMAT = "csv"  # Balanced output files: "csv", or "parquet" for Snappy-compressed Parquet
+MAX_WORKERS = 4  # Files balanced in parallel; each loads its whole CSV, so lower this if RAM is tight
+KD_TREE_MAX_FEATURES = 50  # Above this many features a KD-tree is no faster than brute force
 
 
 # ===== FUNCTIONS =====
@@ -16,14 +23,13 @@ def get_csv_files(folder):
     return [os.path.join(folder, f) for f in os.listdir(folder) if f.endswith(".csv")]
 
 
-def display_label_counts(y, le, file_name):
+def display_label_counts(y, classes, file_name):
     """Display label counts for a specific file"""
     counts = Counter(y)
-    rev_mapping = {i: label for i, label in enumerate(le.classes_)}
 
     print(f"\n--- Label distribution for '{file_name}' ---")
     for k in sorted(counts.keys()):
-        print(f"  {rev_mapping[k]:<20}: {counts.get(k, 0):,}")
+        print(f"  {classes[k]:<20}: {counts.get(k, 0):,}")
     print(f"Total samples: {sum(counts.values()):,}")
     print("--------------------------------------------------")
 
@@ -55,7 +61,8 @@ def apply_resampling(X, y, target_strategy, oversampler_class):
     undersample = {c: t for c, t in target_strategy.items() if c in current_counts and current_counts[c] > t}
     oversample = {c: t for c, t in target_strategy.items() if c in current_counts and current_counts[c] < t}
 
-    X_res, y_res = X.copy(), y.copy()
+    # The samplers return new arrays and never modify their input, so no copy is needed
+    X_res, y_res = X, y
 
     if undersample:
         print("\nUndersampling started...")
@@ -69,13 +76,78 @@ def apply_resampling(X, y, target_strategy, oversampler_class):
         k_neighbors = max(1, min(min_samples_for_smote - 1, 5))
 
         print(f"Using {oversampler_class.__name__} with k_neighbors={k_neighbors}...")
-        sampler = oversampler_class(sampling_strategy=oversample, k_neighbors=k_neighbors, random_state=42)
+        # The samplers accept a neighbours estimator in place of a count (k + 1 counts the
+        # sample itself); this one queries on this file's share of the cores and uses a
+        # KD-tree when it can
+        algorithm = 'kd_tree' if X_res.shape[1] <= KD_TREE_MAX_FEATURES else 'auto'
+        n_jobs = max(1, (os.cpu_count() or 1) // MAX_WORKERS)
+        nn = NearestNeighbors(n_neighbors=k_neighbors + 1, algorithm=algorithm, n_jobs=n_jobs)
+        # ADASYN names its neighbours parameter n_neighbors
+        nn_param = 'n_neighbors' if oversampler_class is ADASYN else 'k_neighbors'
+        sampler = oversampler_class(sampling_strategy=oversample, random_state=42, **{nn_param: nn})
         X_res, y_res = sampler.fit_resample(X_res, y_res)
         print("Oversampling done.")
 
     return X_res, y_res
 
 
+def process_csv_file(file_path, ratio, oversampler_class, method_output_folder):
+    """Balance one CSV file in a worker process and return its progress report
+
+    The report is printed by the parent in one piece, so the output of files balanced
+    at the same time does not interleave.
+    """
+    report = io.StringIO()
+    with redirect_stdout(report):
+        balance_csv_file(file_path, ratio, oversampler_class, method_output_folder)
+    return report.getvalue()
+
+
+def balance_csv_file(file_path, ratio, oversampler_class, method_output_folder):
+    """Balance one CSV file with the given oversampler and save the result"""
+    df = pd.read_csv(file_path)
+
+    if 'label' not in df.columns:
+        print(f"\nSkipping '{os.path.basename(file_path)}' (no 'label' column found).")
+        return
+
+    # The category codes are the label encoding: categories are sorted like
+    # LabelEncoder's classes_, without a second pass to build them
+    labels = df['label'].astype('category')
+    if labels.isna().any():
+        print(f"\nSkipping '{os.path.basename(file_path)}' (missing values in the 'label' column).")
+        return
+    classes = labels.cat.categories.to_numpy()
+    y_enc = labels.cat.codes.to_numpy()
+    display_label_counts(y_enc, classes, os.path.basename(file_path))
+
+    target_strategy = calculate_target_strategy(y_enc, ratio)
+
+    X = df.drop("label", axis=1)
+    # Integer features are downcast without loss to save memory; float features keep
+    # float64, so the original rows are saved unchanged
+    for col in X.select_dtypes('integer').columns:
+        X[col] = pd.to_numeric(X[col], downcast='integer')
+    X_bal, y_bal = apply_resampling(X, y_enc, target_strategy, oversampler_class)
+
+    df_bal = pd.DataFrame(X_bal, columns=X.columns)
+    df_bal["label"] = classes[y_bal]
+
+    display_label_counts(y_bal, classes, f"{os.path.basename(file_path)} (Balanced)")
+
+    out_file = os.path.join(method_output_folder,
+                            os.path.basename(file_path).replace(".csv", f"_balanced.{OUTPUT_FORMAT}"))
+    if OUTPUT_FORMAT == "parquet":
+        # Columnar binary output skips formatting every number as text, and
+        # 500k-row groups let readers stream it with ParquetFile.iter_batches
+        df_bal.to_parquet(out_file, engine='pyarrow', compression='snappy', index=False,
+                          row_group_size=500_000)
+    else:
+        df_bal.to_csv(out_file, index=False)
+    print(f"\nSaved balanced {OUTPUT_FORMAT.upper()} to '{oversampler_class.__name__}' folder: "
+          f"{os.path.basename(out_file)}")
+
+
 # ===== MAIN SCRIPT =====
 def main():
     os.makedirs(OUTPUT_FOLDER, exist_ok=True)
@@ -134,30 +206,12 @@ def main():
         method_output_folder = os.path.join(OUTPUT_FOLDER, method_name)
         os.makedirs(method_output_folder, exist_ok=True)
 
-        for file_path in files_to_process:
-            df = pd.read_csv(file_path)
-
-            if 'label' not in df.columns:
-                print(f"\nSkipping '{os.path.basename(file_path)}' (no 'label' column found).")
-                continue
-
-            le = LabelEncoder()
-            y_enc = le.fit_transform(df['label'])
-            display_label_counts(y_enc, le, os.path.basename(file_path))
-
-            target_strategy = calculate_target_strategy(y_enc, ratio)
-
-            X = df.drop("label", axis=1)
-            X_bal, y_bal = apply_resampling(X, y_enc, target_strategy, oversampler_class)
-
-            df_bal = pd.DataFrame(X_bal, columns=X.columns)
-            df_bal["label"] = le.inverse_transform(y_bal)
-
-            display_label_counts(y_bal, le, f"{os.path.basename(file_path)} (Balanced)")
-
-            out_file = os.path.join(method_output_folder, os.path.basename(file_path).replace(".csv", "_balanced.csv"))
-            df_bal.to_csv(out_file, index=False)
-            print(f"\nSaved balanced CSV to '{method_name}' folder: {os.path.basename(out_file)}")
+        # Files are independent, so each is balanced in its own process; the reports
+        # come back in file order and are printed whole
+        with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            for report in executor.map(partial(process_csv_file, ratio=ratio, oversampler_class=oversampler_class,
+                                               method_output_folder=method_output_folder), files_to_process):
+                print(report, end="")
 
     print("\nAll selected files and methods processed.")
 
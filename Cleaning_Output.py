@@ -0,0 +1,60 @@
+"""Shared output for the cleaning scripts.
+
+Arrow parses the input on all cores, but every CSV row is written by pandas' to_csv, so a
+cleaned file has the same format whichever read path produced it. Arrow parses floats
+exactly, so the pandas fallbacks read with float_precision='round_trip' to match.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# read_csv keyword for the pandas fallbacks, so they parse floats like Arrow's reader
+ROUND_TRIP = {'float_precision': 'round_trip'}
+
+
+def write_csv_header(sink, names):
+    """Writes a CSV header line to an open binary file, as pandas' to_csv writes it."""
+    pd.DataFrame(columns=names).to_csv(sink, index=False)
+
+
+def write_csv_rows(batch, sink):
+    """Appends the rows of an Arrow batch or table to an open binary file with pandas' to_csv."""
+    batch.to_pandas().to_csv(sink, index=False, header=False)
+
+
+def write_batches(batches, output_path):
+    """Writes Arrow batches to one file, using the schema of the first batch.
+
+    A path ending in .parquet is written as Snappy-compressed Parquet, anything else as CSV.
+    """
+    if not output_path.endswith(".parquet"):
+        with open(output_path, 'wb') as sink:
+            for i, batch in enumerate(batches):
+                if i == 0:
+                    write_csv_header(sink, batch.schema.names)
+                write_csv_rows(batch, sink)
+        return
+    writer = None
+    try:
+        for batch in batches:
+            if writer is None:
+                writer = pq.ParquetWriter(output_path, batch.schema, compression='snappy')
+            writer.write_batch(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def impute_inf_batch(batch, medians):
+    """Replaces the 'inf' values in the given columns of an Arrow batch with the column medians."""
+    for col, median_val in medians.items():
+        i = batch.schema.get_field_index(col)
+        if i == -1:
+            continue
+        # Coerced like pd.to_numeric(errors='coerce'): text that is not a number becomes null
+        values = pd.to_numeric(batch.column(i).to_pandas(), errors='coerce').to_numpy(dtype=np.float64,
+                                                                                       na_value=np.nan)
+        values = np.where(np.isinf(values), median_val, values)
+        batch = batch.set_column(i, col, pa.array(values, from_pandas=True))
+    return batch
@@ -1,12 +1,27 @@
+import io
 import os
+import json
+import re
 import pandas as pd
 import numpy as np
-from collections import Counter, defaultdict
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from functools import lru_cache, partial
+from itertools import islice
+
+from Cleaning_Output import ROUND_TRIP, impute_inf_batch, write_batches, write_csv_header, write_csv_rows
 
 # --- 1. GLOBAL CONFIGURATION ---
 INPUT_FOLDER = "Downscale_Csv_2018"
 OUTPUT_FOLDER = "Cleaned_Files_2018"
 CHUNK_SIZE = 1_000_000
+ARROW_BLOCK_SIZE = 64 << 20  # Bytes per block for the multithreaded Arrow CSV parser
+MAX_WORKERS = 4  # Files processed in parallel; Task 2 loads each whole CSV, so lower this if RAM is tight
 
 # --- Task 1 Config ---
 DOMINANCE_RANGES = [
@@ -14,6 +29,7 @@ DOMINANCE_RANGES = [
     (0.80, 0.90, "80-90%"), (0.70, 0.80, "70-80%"),
     (0.60, 0.70, "60-70%"), (0.50, 0.60, "50-60%"),
 ]
+TOP_K = 50  # Most frequent values listed per column in the dominance report
 
 # --- Task 2 Config ---
 NEVER_NEGATIVE_KEYWORDS = [
@@ -22,10 +38,14 @@ NEVER_NEGATIVE_KEYWORDS = [
     'iat', 'active', 'idle', 'bulk', 'handshake', 'subflow'
 ]
 CAN_BE_NEGATIVE_KEYWORDS = ['skew', 'cov', 'delta']
+# Each keyword list compiled into one pattern, so a column name is scanned once per list
+NEVER_NEGATIVE_PATTERN = re.compile('|'.join(map(re.escape, NEVER_NEGATIVE_KEYWORDS)))
+CAN_BE_NEGATIVE_PATTERN = re.compile('|'.join(map(re.escape, CAN_BE_NEGATIVE_KEYWORDS)))
 PORT_COLUMNS = ['src_port', 'dst_port']
 
 # --- Task 3 Config ---
 INF_THRESHOLD = 0.30  # 30% threshold for removing 'inf' columns
+OUTPUT_FORMAT = "csv"  # Task 3 output files: "csv", or "parquet" for Snappy-compressed Parquet
 
 
 # ==============================================================================
@@ -43,6 +63,84 @@ def get_user_yes_no(prompt):
             print("Invalid input. Please enter 'y' or 'n'.")
 
 
+@lru_cache(maxsize=None)
+def is_column_never_negative(col):
+    """Decides from the column name whether its values can never be negative."""
+    lower = col.lower()
+    return NEVER_NEGATIVE_PATTERN.search(lower) is not None and CAN_BE_NEGATIVE_PATTERN.search(lower) is None
+
+
+def iter_csv_batches(file_path, convert_options=None):
+    """Streams a CSV as Arrow RecordBatches using the multithreaded Arrow parser."""
+    reader = pacsv.open_csv(file_path,
+                            read_options=pacsv.ReadOptions(block_size=ARROW_BLOCK_SIZE, use_threads=True),
+                            convert_options=convert_options)
+    for batch in reader:
+        yield batch
+
+
+def iter_file_batches(file_path, columns=None, as_text=False):
+    """Streams a CSV or Parquet file as Arrow RecordBatches, optionally only the given columns.
+
+    as_text reads every CSV column as a string, for files whose column types change part way through.
+    """
+    if file_path.endswith(".parquet"):
+        yield from pq.ParquetFile(file_path).iter_batches(columns=columns)
+        return
+    convert_options = pacsv.ConvertOptions(include_columns=columns or [])
+    if as_text:
+        names = columns or pd.read_csv(file_path, nrows=0).columns
+        convert_options.column_types = {col: pa.string() for col in names}
+    yield from iter_csv_batches(file_path, convert_options)
+
+
+def write_output(file_path, output_path, columns=None, transform=None):
+    """Streams a file into an OUTPUT_FORMAT file, optionally passing each batch through transform.
+
+    Both writers need one schema for the whole file, so a CSV with a column that changes
+    type later (e.g. a repeated header row) is read again with every column as text.
+    """
+    transform = transform or (lambda batch: batch)
+    try:
+        write_batches(map(transform, iter_file_batches(file_path, columns)), output_path)
+    except pa.ArrowInvalid:
+        write_batches(map(transform, iter_file_batches(file_path, columns, as_text=True)), output_path)
+
+
+def text_convert_options(file_path):
+    """ConvertOptions that read every column of a CSV as dictionary-encoded text.
+
+    Values keep exactly the text they have in the file, each distinct value is stored
+    once, and the columns reach pandas as categoricals instead of Python str objects.
+    """
+    columns = pd.read_csv(file_path, nrows=0).columns
+    text_type = pa.dictionary(pa.int32(), pa.string())
+    return pacsv.ConvertOptions(column_types={c: text_type for c in columns}, strings_can_be_null=True)
+
+
+def write_csv_without_columns(file_path, output_csv_path, columns_to_delete):
+    """Streams a copy of the CSV without the given columns, parsed by Arrow and written by pandas."""
+    # Deleted columns are left out at parse time, so they are never converted or held in memory
+    keep_columns = [col for col in pd.read_csv(file_path, nrows=0).columns if col not in columns_to_delete]
+    try:
+        with open(output_csv_path, 'wb') as sink:
+            write_csv_header(sink, keep_columns)
+            for batch in iter_csv_batches(file_path, pacsv.ConvertOptions(include_columns=keep_columns)):
+                write_csv_rows(batch, sink)
+    except pa.ArrowInvalid:
+        # Arrow's streaming reader fixes column types from the first block, so a column
+        # that changes type later (e.g. a repeated header row) needs the pandas path
+        is_first_chunk = True
+        # Deleted columns are skipped by the parser instead of being dropped from each chunk
+        for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE, usecols=lambda col: col not in columns_to_delete,
+                                 low_memory=False, **ROUND_TRIP):
+            if is_first_chunk:
+                chunk.to_csv(output_csv_path, index=False, mode='w')
+                is_first_chunk = False
+            else:
+                chunk.to_csv(output_csv_path, index=False, mode='a', header=False)
+
+
 # ==============================================================================
 # TASK 1: STATIC DOMINANCE REPORT LOGIC
 # ==============================================================================
@@ -52,24 +150,46 @@ def generate_dominance_report(file_path):
     col_counters = defaultdict(Counter)
     total_counts = Counter()
     label_counter = Counter()
-    col_value_label_counter = defaultdict(lambda: defaultdict(Counter))
+    pair_counts = defaultdict(list)  # column -> per-chunk (value, label) counts
     try:
-        for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE, dtype=str, low_memory=False):
-            labels = chunk.get("Label") or chunk.get("label")
+        # Every column is read as text so values are reported exactly as written. The
+        # categorical columns let value_counts and groupby hash small integer codes.
+        for batch in iter_csv_batches(file_path, text_convert_options(file_path)):
+            chunk = batch.to_pandas()
+            label_col = next((c for c in ("Label", "label") if c in chunk.columns), None)
+            labels = chunk[label_col] if label_col is not None else None
             if labels is not None:
-                label_counter.update(labels.dropna())
+                label_counter.update(labels.value_counts().to_dict())
+                label_codes, label_names = pd.factorize(labels)
             for col in chunk.columns:
-                values = chunk[col].dropna()
-                col_counters[col].update(values)
-                total_counts[col] += len(values)
+                # value_counts hashes in C and skips nulls; the Counter sees one update per chunk
+                values = chunk[col].value_counts()
+                col_counters[col].update(values.to_dict())
+                total_counts[col] += int(values.sum())
                 if labels is not None and col.lower() != "label":
-                    for v, lbl in zip(chunk[col], labels):
-                        if pd.notna(v) and pd.notna(lbl):
-                            col_value_label_counter[col][v][lbl] += 1
+                    # Each (value, label) pair of factorized codes becomes one integer, so a single
+                    # bincount tallies every pair; labels are factorized once per chunk, and
+                    # code -1 marks a missing value
+                    value_codes, value_names = pd.factorize(chunk[col])
+                    valid = (value_codes >= 0) & (label_codes >= 0)
+                    tally = np.bincount(value_codes[valid].astype(np.int64) * len(label_names) + label_codes[valid])
+                    present = np.flatnonzero(tally)
+                    pair_counts[col].append(pd.Series(tally[present], index=pd.MultiIndex.from_arrays(
+                        [value_names[present // len(label_names)], label_names[present % len(label_names)]])))
+        # Every (column, value, label) count in one long Series, summed once at the end
+        value_label_counts = None
+        paired_cols = set()
+        if pair_counts:
+            value_label_counts = pd.concat({col: pd.concat(parts) for col, parts in pair_counts.items()},
+                                           names=['source_col', 'value', 'label'])
+            value_label_counts = value_label_counts.groupby(level=[0, 1, 2], sort=False).sum()
+            paired_cols = set(value_label_counts.index.unique(level='source_col'))
+            del pair_counts
         bucketed = {label: [] for _, _, label in DOMINANCE_RANGES}
         for col, counts in col_counters.items():
             if total_counts[col] == 0: continue
-            _, most_common_count = counts.most_common(1)[0]
+            # Only the top count matters here, so skip the sort inside most_common(1)
+            most_common_count = max(counts.values())
             ratio = most_common_count / total_counts[col]
             for low, high, label in DOMINANCE_RANGES:
                 if low <= ratio < high:
@@ -86,7 +206,8 @@ def generate_dominance_report(file_path):
                 label_header = "Global Label Distribution:\n" + "-" * 40
                 f.write(label_header + "\n")
                 print("\n" + label_header)
-                for lbl, count in label_counter.most_common():
+                label_series = pd.Series(label_counter).sort_values(ascending=False, kind='stable')
+                for lbl, count in label_series.items():
                     line_text = f"  {lbl}: {count:,} ({(count / total_labels) * 100:.2f}%)"
                     f.write(line_text + "\n")
                     print(line_text)
@@ -103,15 +224,29 @@ def generate_dominance_report(file_path):
                         col_header = f"\nColumn: {col}"
                         f.write(col_header + "\n")
                         print(col_header)
-                        for val, count in counts.most_common():
+                        # One sort per column; a stable sort keeps ties in first-seen order like most_common
+                        value_series = pd.Series(counts).sort_values(ascending=False, kind='stable')
+                        top_values = value_series.head(TOP_K)
+                        label_breakdowns = {}
+                        if col in paired_cols:
+                            col_pairs = value_label_counts.xs(col, level='source_col')
+                            col_pairs = col_pairs[col_pairs.index.get_level_values('value').isin(top_values.index)]
+                            label_breakdowns = {
+                                val: lbl_counts.droplevel('value').sort_values(ascending=False, kind='stable')
+                                for val, lbl_counts in col_pairs.groupby(level='value', sort=False)}
+                        for val, count in top_values.items():
                             ratio = count / total
                             line_to_output = f"  Value '{val}': {count:,} ({ratio * 100:.2f}%)"
-                            if val in col_value_label_counter.get(col, {}):
-                                lbl_counts = col_value_label_counter[col][val]
-                                breakdown = ", ".join(f"{lbl}: {c:,}" for lbl, c in lbl_counts.most_common())
+                            if val in label_breakdowns:
+                                lbl_counts = label_breakdowns[val]
+                                breakdown = ", ".join(f"{lbl}: {c:,}" for lbl, c in lbl_counts.items())
                                 line_to_output += f" -> Labels: [{breakdown}]"
                             f.write(line_to_output + "\n")
                             print(line_to_output)
+                        if len(value_series) > TOP_K:
+                            more_text = f"  ... and {len(value_series) - TOP_K:,} more values"
+                            f.write(more_text + "\n")
+                            print(more_text)
         print(f"\nReport saved to: {report_path}")
     except Exception as e:
         print(f"ERROR during dominance report: {e}")
@@ -123,53 +258,68 @@ def run_data_validation(file_path):
     """Loads a CSV and runs the full validation and cleaning pipeline."""
     print(f"\n--- [Task 2] Validating and Cleaning: {os.path.basename(file_path)} ---")
     try:
-        # Load the entire file into memory for this task
-        df = pd.concat([chunk for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE)])
-        print(f"Loaded {len(df):,} rows.")
+        # Load the entire file into memory for this task. The file stays an Arrow table
+        # until it is written: only the checked columns are copied out as numbers, and
+        # the clean rows are filtered by Arrow before pandas' to_csv writes them.
+        table = pacsv.read_csv(file_path,
+                               read_options=pacsv.ReadOptions(block_size=ARROW_BLOCK_SIZE, use_threads=True),
+                               convert_options=pacsv.ConvertOptions(strings_can_be_null=True))
+        print(f"Loaded {table.num_rows:,} rows.")
         results = {'negative_issues': {}, 'port_issues': {}}
 
         # Standardize label column name
-        if 'Label' in df.columns and 'label' not in df.columns:
-            df = df.rename(columns={'Label': 'label'})
-        if 'label' not in df.columns:
+        if 'Label' in table.column_names and 'label' not in table.column_names:
+            table = table.rename_columns(['label' if col == 'Label' else col for col in table.column_names])
+        if 'label' not in table.column_names:
             print("Warning: 'label' column not found. Creating a placeholder.")
-            df['label'] = 'Unknown'
-
-        # Check for negative values in specific columns
-        for col in df.columns:
-            if any(kw in col.lower() for kw in CAN_BE_NEGATIVE_KEYWORDS):
-                continue
-            if any(kw in col.lower() for kw in NEVER_NEGATIVE_KEYWORDS):
-                numeric_col = pd.to_numeric(df[col], errors='coerce')
-                if (numeric_col < 0).any():
-                    mask = numeric_col < 0
-                    results['negative_issues'][col] = {'count': mask.sum(), 'rows': list(df[mask].index)}
-
-        # Check for invalid port numbers
-        for col in PORT_COLUMNS:
-            if col in df.columns:
-                numeric_col = pd.to_numeric(df[col], errors='coerce')
-                if (~numeric_col.between(0, 65535)).any():
-                    mask = ~numeric_col.between(0, 65535)
-                    results['port_issues'][col] = {'count': mask.sum(), 'rows': list(df[mask].index)}
-
-        # Aggregate all invalid row indices
-        invalid_indices = set()
-        for group in results.values():
-            for info in group.values():
-                invalid_indices.update(info['rows'])
-
-        if not invalid_indices:
+            table = table.append_column('label', pa.repeat('Unknown', table.num_rows))
+
+        # Every checked column is converted to numbers once, into one float block that
+        # both the negative and the port checks index by column position
+        never_neg_cols = [col for col in table.column_names if is_column_never_negative(col)]
+        port_cols = [col for col in PORT_COLUMNS if col in table.column_names]
+        check_cols = list(dict.fromkeys(never_neg_cols + port_cols))
+        col_pos = {col: j for j, col in enumerate(check_cols)}
+        num = np.empty((table.num_rows, len(check_cols)), dtype=np.float64, order='F')  # Contiguous columns
+        for j, col in enumerate(check_cols):
+            column = table.column(col)
+            if pa.types.is_integer(column.type) or pa.types.is_floating(column.type):
+                num[:, j] = column.to_numpy()  # Nulls arrive as NaN
+            else:
+                num[:, j] = pd.to_numeric(column.to_pandas(), errors='coerce')
+
+        # Each check is a range rule on one column: values must lie in [lo, hi], and a
+        # missing or non-numeric value fails only where nan_invalid is set. Every rule is
+        # tested on a view of its column of the block, so the values are never copied.
+        rules = ([('negative_issues', col, 0, np.inf, False) for col in never_neg_cols]  # Negative values
+                 + [('port_issues', col, 0, 65535, True) for col in port_cols])  # Invalid port numbers
+        # Rows (by position) that break at least one rule
+        invalid_row_mask = np.zeros(table.num_rows, dtype=bool)
+        for issue, col, lo, hi, nan_invalid in rules:
+            values = num[:, col_pos[col]]
+            bad = (values < lo) | (values > hi)
+            if nan_invalid:
+                bad |= np.isnan(values)
+            bad_count = int(np.count_nonzero(bad))
+            if bad_count:
+                # Only counts are kept per column; the rows themselves live in invalid_row_mask
+                results[issue][col] = {'count': bad_count}
+                invalid_row_mask |= bad
+        invalid_count = int(invalid_row_mask.sum())
+
+        if not invalid_count:
             print("\n[RESULT] No invalid rows found based on the rules.")
             return
 
-        print(f"\n[RESULT] Found {len(invalid_indices):,} unique rows with invalid values.")
+        print(f"\n[RESULT] Found {invalid_count:,} unique rows with invalid values.")
         if get_user_yes_no("Do you want to remove these invalid rows and save a new file?"):
-            df_clean = df.drop(index=list(invalid_indices)).copy()
+            table_clean = table.filter(pa.array(~invalid_row_mask))
             clean_filename = f"{os.path.splitext(os.path.basename(file_path))[0]}_validated.csv"
             output_path = os.path.join(OUTPUT_FOLDER, clean_filename)
-            df_clean.to_csv(output_path, index=False)
-            print(f"  Successfully saved clean data ({len(df_clean):,} rows) to: {output_path}")
+            with open(output_path, 'wb') as sink:
+                write_csv_header(sink, table_clean.column_names)
+                write_csv_rows(table_clean, sink)
+            print(f"  Successfully saved clean data ({table_clean.num_rows:,} rows) to: {output_path}")
         else:
             print("  Skipping data cleaning.")
     except Exception as e:
@@ -178,16 +328,103 @@ def run_data_validation(file_path):
 # ==============================================================================
 # TASK 3: 'INF' COLUMN REMOVAL & IMPUTATION LOGIC
 # ==============================================================================
-def run_inf_column_removal(file_path):
-    """Analyzes and removes columns with a high percentage of 'inf' values."""
+def inf_counts_path(file_path):
+    """JSON file where count_inf_values saves its result for later runs."""
+    return os.path.join(OUTPUT_FOLDER, f"{os.path.splitext(os.path.basename(file_path))[0]}_inf_counts.json")
+
+
+def load_inf_counts(file_path):
+    """Returns the (inf_counts, total_rows) saved for a file, or None if it changed since."""
+    try:
+        with open(inf_counts_path(file_path)) as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return None
+    stat = os.stat(file_path)
+    if saved.get('key') != [stat.st_size, stat.st_mtime_ns]:
+        return None
+    return pd.Series(saved['inf_counts'], index=saved['columns'], dtype=np.int64), saved['total_rows']
+
+
+def save_inf_counts(file_path, inf_counts, total_rows):
+    """Saves a count_inf_values result, keyed by the file's size and modification time."""
+    stat = os.stat(file_path)
+    with open(inf_counts_path(file_path), 'w') as f:
+        json.dump({'key': [stat.st_size, stat.st_mtime_ns], 'columns': list(inf_counts.index),
+                   'inf_counts': inf_counts.tolist(), 'total_rows': total_rows}, f)
+
+
+def count_inf_values(file_path, reuse=False):
+    """Counts the 'inf' values in every column, returning (inf_counts, total_rows).
+
+    The file is streamed once through the Arrow reader and float columns are tested
+    as NumPy views. With reuse=True a result saved by an earlier run is returned while the file is
+    unchanged, and a new result is saved for the next run.
+    """
+    saved = load_inf_counts(file_path) if reuse else None
+    if saved is not None:
+        return saved
+    try:
+        inf_counts = None
+        total_rows = 0
+        for batch in iter_file_batches(file_path):
+            if inf_counts is None:
+                columns = pd.Index(batch.schema.names)
+                inf_counts = np.zeros(len(columns), dtype=np.int64)
+            for j, column in enumerate(batch.columns):
+                if pa.types.is_floating(column.type):
+                    # A NumPy view of the column (nulls read as NaN) with count_nonzero beats
+                    # is_inf + sum, which builds a mask and then reduces it in a second kernel
+                    inf_counts[j] += np.count_nonzero(np.isinf(column.to_numpy(zero_copy_only=False)))
+                elif pa.types.is_string(column.type):
+                    # Text columns can still hold values like 'inf' next to non-numbers
+                    inf_counts[j] += np.count_nonzero(np.isinf(pd.to_numeric(column.to_pandas(), errors='coerce')))
+            total_rows += batch.num_rows
+    except pa.ArrowInvalid:
+        # Arrow's streaming reader fixes column types from the first block, so a column
+        # that changes type later (e.g. a repeated header row) needs the pandas path
+        inf_counts, total_rows = _count_inf_values_pandas(file_path)
+        if reuse:
+            save_inf_counts(file_path, inf_counts, total_rows)
+        return inf_counts, total_rows
+    inf_counts = pd.Series(dtype=int) if inf_counts is None else pd.Series(inf_counts, index=columns)
+    if reuse:
+        save_inf_counts(file_path, inf_counts, total_rows)
+    return inf_counts, total_rows
+
+
+def _count_inf_values_pandas(file_path):
+    """Fallback for count_inf_values on files with mixed-type columns."""
+    inf_counts = None
+    total_rows = 0
+    for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE, low_memory=False):
+        if inf_counts is None:
+            columns = chunk.columns
+            inf_counts = np.zeros(len(columns), dtype=np.int64)
+        total_rows += len(chunk)
+        # Float columns are tested as one block; only text columns need converting,
+        # since integer and boolean columns cannot hold 'inf'
+        floats = chunk.select_dtypes(include='floating')
+        inf_counts[columns.get_indexer(floats.columns)] += np.count_nonzero(np.isinf(floats.to_numpy()), axis=0)
+        for col in chunk.select_dtypes(exclude=['number', 'bool']).columns:
+            inf_counts[columns.get_loc(col)] += np.count_nonzero(np.isinf(pd.to_numeric(chunk[col], errors='coerce')))
+    if inf_counts is None:
+        return pd.Series(dtype=int), 0
+    return pd.Series(inf_counts, index=columns), total_rows
+
+
+def run_inf_column_removal(file_path, inf_analysis=None):
+    """Analyzes and removes columns with a high percentage of 'inf' values.
+
+    inf_analysis can hold a precomputed (inf_counts, total_rows) result from
+    count_inf_values, in which case Phase 1 does not read the file again.
+    """
     print(f"\n--- [Task 3] Processing for 'inf' columns: {os.path.basename(file_path)} ---")
     print(f"Phase 1: Analyzing columns (Threshold: {INF_THRESHOLD:.0%})...")
-    inf_counts = pd.Series(dtype=int)
-    total_rows = 0
     try:
-        for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE, low_memory=False):
-            total_rows += len(chunk)
-            inf_counts = inf_counts.add(chunk.apply(pd.to_numeric, errors='coerce').pipe(np.isinf).sum(), fill_value=0)
+        if inf_analysis is None:
+            inf_analysis = count_inf_values(file_path, reuse=True)
+        inf_counts, total_rows = inf_analysis
         if total_rows == 0:
             print("File is empty. Skipping.")
             return
@@ -214,17 +451,14 @@ def run_inf_column_removal(file_path):
 
     print("\nPhase 2: Deleting columns and creating new file...")
     base_name = os.path.splitext(os.path.basename(file_path))[0]
-    output_filename = f"{base_name}_inf_cleaned.csv"
-    output_csv_path = os.path.join(OUTPUT_FOLDER, output_filename)
+    output_filename = f"{base_name}_inf_cleaned.{OUTPUT_FORMAT}"
+    output_path = os.path.join(OUTPUT_FOLDER, output_filename)
     try:
-        is_first_chunk = True
-        for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE, low_memory=False):
-            chunk.drop(columns=columns_to_delete, inplace=True, errors='ignore')
-            if is_first_chunk:
-                chunk.to_csv(output_csv_path, index=False, mode='w')
-                is_first_chunk = False
-            else:
-                chunk.to_csv(output_csv_path, index=False, mode='a', header=False)
+        if OUTPUT_FORMAT == "parquet":
+            keep_columns = [col for col in pd.read_csv(file_path, nrows=0).columns if col not in columns_to_delete]
+            write_output(file_path, output_path, columns=keep_columns)
+        else:
+            write_csv_without_columns(file_path, output_path, columns_to_delete)
         print(f"  Successfully created '{output_filename}'")
         print("\n--- Next Steps for the Cleaned File ---")
         print("  1: Re-analyze the cleaned file for remaining 'inf' values")
@@ -232,9 +466,9 @@ def run_inf_column_removal(file_path):
         print("  3: Do nothing / Continue")
         choice = input("Enter your choice (1, 2, or 3): ")
         if choice == '1':
-            report_remaining_inf(output_csv_path)
+            report_remaining_inf(output_path)
         elif choice == '2':
-            run_inf_imputation(output_csv_path)
+            run_inf_imputation(output_path)
         else:
             print("Continuing.")
     except Exception as e:
@@ -243,12 +477,8 @@ def run_inf_column_removal(file_path):
 def report_remaining_inf(file_path):
     """A simple analysis pass to report, but not act on, 'inf' values."""
     print(f"\n--- Re-analyzing for remaining 'inf' in {os.path.basename(file_path)} ---")
-    inf_counts = pd.Series(dtype=int)
-    total_rows = 0
     try:
-        for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE, low_memory=False):
-            total_rows += len(chunk)
-            inf_counts = inf_counts.add(chunk.apply(pd.to_numeric, errors='coerce').pipe(np.isinf).sum(), fill_value=0)
+        inf_counts, total_rows = count_inf_values(file_path)
         if total_rows == 0: return
         inf_percentages = inf_counts / total_rows
         remaining_inf_cols = inf_percentages[inf_percentages > 0].index.tolist()
@@ -267,32 +497,26 @@ def run_inf_imputation(file_path):
     medians = {}
     try:
         print("Phase 1: Calculating medians for columns with 'inf' values...")
-        inf_counts = pd.Series(dtype=int)
-        for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE, low_memory=False):
-            inf_counts = inf_counts.add(chunk.apply(pd.to_numeric, errors='coerce').pipe(np.isinf).sum(), fill_value=0)
+        inf_counts, _ = count_inf_values(file_path)
         cols_to_process = inf_counts[inf_counts > 0].index.tolist()
         if not cols_to_process:
             print("No 'inf' values found to impute.")
             return
+        # All affected columns come from one projected read instead of one read per column
+        if file_path.endswith(".parquet"):
+            inf_columns = pd.read_parquet(file_path, columns=cols_to_process)
+        else:
+            inf_columns = pd.read_csv(file_path, usecols=cols_to_process, low_memory=False)
         for col in cols_to_process:
-            series = pd.read_csv(file_path, usecols=[col], low_memory=False).squeeze("columns")
-            median_val = pd.to_numeric(series, errors='coerce').replace([np.inf, -np.inf], np.nan).median()
+            median_val = pd.to_numeric(inf_columns[col], errors='coerce').replace([np.inf, -np.inf], np.nan).median()
             medians[col] = median_val
             print(f"  - Column '{col}': Median is {median_val}")
+        del inf_columns
         print("\nPhase 2: Replacing 'inf' values and saving new file...")
         base_name = os.path.splitext(os.path.basename(file_path))[0].replace('_inf_cleaned', '')
-        output_filename = f"{base_name}_imputed.csv"
-        output_csv_path = os.path.join(OUTPUT_FOLDER, output_filename)
-        is_first_chunk = True
-        for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE, low_memory=False):
-            for col, median_val in medians.items():
-                if col in chunk.columns:
-                    chunk[col] = pd.to_numeric(chunk[col], errors='coerce').replace([np.inf, -np.inf], median_val)
-            if is_first_chunk:
-                chunk.to_csv(output_csv_path, index=False, mode='w')
-                is_first_chunk = False
-            else:
-                chunk.to_csv(output_csv_path, index=False, mode='a', header=False)
+        output_filename = f"{base_name}_imputed.{OUTPUT_FORMAT}"
+        output_path = os.path.join(OUTPUT_FOLDER, output_filename)
+        write_output(file_path, output_path, transform=partial(impute_inf_batch, medians=medians))
         print(f"  Successfully created '{output_filename}'")
     except Exception as e:
         print(f"ERROR during imputation: {e}")
@@ -300,17 +524,30 @@ def run_inf_imputation(file_path):
 # ==============================================================================
 # TASK 4: REMOVE CONSTANT OR LOW-VARIANCE COLUMNS
 # ==============================================================================
-def run_variance_analysis(file_path):
+def collect_unique_values(file_path):
+    """Collects the distinct values of every column in a CSV, in the order they first appear."""
+    col_unique_values = {}
+    for batch in iter_csv_batches(file_path, text_convert_options(file_path)):
+        for col, column in zip(batch.schema.names, batch.columns):
+            # The codes in use pick each distinct value out of the batch dictionary, and
+            # batches are merged with Arrow's hash kernel instead of a Python set
+            values = column.dictionary.take(pc.unique(column.indices.drop_null()))
+            if col in col_unique_values:
+                values = pc.unique(pa.concat_arrays([col_unique_values[col], values]))
+            col_unique_values[col] = values
+    return {col: values.to_pylist() for col, values in col_unique_values.items()}
+
+
+def run_variance_analysis(file_path, col_unique_values=None):
     """
     Analyzes a CSV for constant/low-variance columns and optionally removes them.
+    col_unique_values can hold a precomputed collect_unique_values result.
     """
     print(f"\n--- [Task 4] Analyzing for Low-Variance Columns: {os.path.basename(file_path)} ---")
     try:
-        print("  Analyzing columns... (this may take a moment for large files)")
-        col_unique_values = defaultdict(set)
-        for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE, dtype=str, low_memory=False):
-            for col in chunk.columns:
-                col_unique_values[col].update(chunk[col].dropna().unique())
+        if col_unique_values is None:
+            print("  Analyzing columns... (this may take a moment for large files)")
+            col_unique_values = collect_unique_values(file_path)
         print("  Analysis complete.")
 
         columns_to_drop = []
@@ -354,12 +591,7 @@ def run_variance_analysis(file_path):
             base_name = os.path.splitext(os.path.basename(file_path))[0]
             output_path = os.path.join(OUTPUT_FOLDER, f"{base_name}_variance_cleaned.csv")
             print(f"  Removing {len(final_drop_list)} columns and saving new file...")
-            chunk_iterator = pd.read_csv(file_path, chunksize=CHUNK_SIZE, low_memory=False)
-            first_chunk = next(chunk_iterator)
-            first_chunk.drop(columns=final_drop_list, errors="ignore").to_csv(output_path, index=False)
-            for chunk in chunk_iterator:
-                chunk.drop(columns=final_drop_list, errors="ignore").to_csv(output_path, mode='a', header=False,
-                                                                            index=False)
+            write_csv_without_columns(file_path, output_path, final_drop_list)
             print(f"  Successfully saved cleaned file to: {output_path}")
         else:
             print("  Skipping file modification as requested.")
@@ -370,22 +602,36 @@ def run_variance_analysis(file_path):
 # ==============================================================================
 # TASK 5: INTERACTIVE DOMINANCE & VARIANCE ANALYSIS (NEW)
 # ==============================================================================
-def run_interactive_dominance_analysis(file_path):
+def count_column_values(file_path):
+    """Counts every value of every column in a CSV, returning (col_counters, total_counts).
+
+    Each column's counts are an integer Series indexed by value.
+    """
+    chunk_counts = defaultdict(list)
+    for batch in iter_csv_batches(file_path, text_convert_options(file_path)):
+        chunk = batch.to_pandas()
+        for col in chunk.columns:
+            chunk_counts[col].append(chunk[col].value_counts())
+    # Per-chunk counts are summed once per column instead of merged chunk by chunk
+    col_counters = {col: pd.concat(parts).groupby(level=0, sort=False).sum()
+                    for col, parts in chunk_counts.items()}
+    total_counts = {col: int(counts.sum()) for col, counts in col_counters.items()}
+    return col_counters, total_counts
+
+
+def run_interactive_dominance_analysis(file_path, column_stats=None):
     """
     Interactively finds columns with a user-defined dominance percentage,
     then allows for a follow-up low-variance check and optional deletion.
+    column_stats can hold a precomputed count_column_values result.
     """
     print(f"\n--- [Task 5] Interactive Dominance Analysis: {os.path.basename(file_path)} ---")
     try:
         # Step 1: Perform a full analysis of the file once
-        print("  Analyzing file to gather column statistics... (this may take a moment)")
-        col_counters = defaultdict(Counter)
-        total_counts = Counter()
-        for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE, dtype=str, low_memory=False):
-            for col in chunk.columns:
-                values = chunk[col].dropna()
-                col_counters[col].update(values)
-                total_counts[col] += len(values)
+        if column_stats is None:
+            print("  Analyzing file to gather column statistics... (this may take a moment)")
+            column_stats = count_column_values(file_path)
+        col_counters, total_counts = column_stats
         print("  Analysis complete.")
 
         # Step 2: Enter the interactive loop for this file
@@ -405,7 +651,8 @@ def run_interactive_dominance_analysis(file_path):
             columns_in_range = {}
             for col, counts in col_counters.items():
                 if total_counts[col] == 0: continue
-                most_common_val, most_common_count = counts.most_common(1)[0]
+                top = counts.to_numpy().argmax()
+                most_common_val, most_common_count = counts.index[top], counts.iat[top]
                 ratio = most_common_count / total_counts[col]
 
                 if (min_perc / 100) <= ratio <= (max_perc / 100):
@@ -442,14 +689,7 @@ def run_interactive_dominance_analysis(file_path):
                     output_path = os.path.join(OUTPUT_FOLDER, output_filename)
 
                     print(f"  Deleting columns and saving to {output_path}...")
-                    is_first_chunk = True
-                    for chunk in pd.read_csv(file_path, chunksize=CHUNK_SIZE, low_memory=False):
-                        chunk.drop(columns=cols_to_delete, inplace=True, errors='ignore')
-                        if is_first_chunk:
-                            chunk.to_csv(output_path, index=False, mode='w')
-                            is_first_chunk = False
-                        else:
-                            chunk.to_csv(output_path, index=False, mode='a', header=False)
+                    write_csv_without_columns(file_path, output_path, cols_to_delete)
                     print("  Deletion successful.")
                 else:
                     print("  Deletion cancelled.")
@@ -466,6 +706,14 @@ def run_interactive_dominance_analysis(file_path):
     except Exception as e:
         print(f"ERROR: An unexpected error occurred: {e}")
 
+def run_captured(func, file_path):
+    """Runs func(file_path) in a worker process and returns what it printed."""
+    report = io.StringIO()
+    with redirect_stdout(report):
+        func(file_path)
+    return report.getvalue()
+
+
 # ==============================================================================
 # MAIN DRIVER: INTEGRATES TASK AND FILE SELECTION
 # ==============================================================================
@@ -517,7 +765,8 @@ def main():
             if not valid_indices:
                 print("Error: No valid file numbers were entered. Please try again.")
                 continue
-            files_to_process = [csv_files[i] for i in valid_indices]
+            # A file picked twice would be processed twice, by two workers at once
+            files_to_process = [csv_files[i] for i in dict.fromkeys(valid_indices)]
             break
         except ValueError:
             print("Invalid input. Please enter numbers separated by commas or 'all'.")
@@ -526,18 +775,43 @@ def main():
     print(f"\nBeginning processing for {len(files_to_process)} selected file(s)...")
     os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
-    for file_path in files_to_process:
-        if task_choice == '1':
-            generate_dominance_report(file_path)
-        elif task_choice == '2':
+    interactive_tasks = {
+        '3': (partial(count_inf_values, reuse=True), run_inf_column_removal),
+        '4': (collect_unique_values, run_variance_analysis),
+        '5': (count_column_values, run_interactive_dominance_analysis),
+    }
+    if task_choice == '1':
+        # Files are independent, so the reports are built in a process pool; each comes
+        # back whole and in file order instead of interleaving with the others
+        with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            for report in executor.map(partial(run_captured, generate_dominance_report), files_to_process):
+                print(report, end="")
+                print("-" * 70)
+    elif task_choice == '2':
+        # Each file's prompt follows its own invalid-row count, so files are validated one at a time
+        for file_path in files_to_process:
             run_data_validation(file_path)
-        elif task_choice == '3':
-            run_inf_column_removal(file_path)
-        elif task_choice == '4':
-            run_variance_analysis(file_path)
-        elif task_choice == '5':
-            run_interactive_dominance_analysis(file_path)
-        print("-" * 70)
+            print("-" * 70)
+    else:
+        # Only the read-heavy analysis runs in parallel; the prompts that follow it are
+        # answered one file at a time in this process, so workers never wait on stdin.
+        # At most MAX_WORKERS analyses run or wait ahead of the prompts, so the results
+        # held at once do not grow with the number of files.
+        analyze, run_task = interactive_tasks[task_choice]
+        remaining = iter(files_to_process)
+        with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            pending = deque((file_path, executor.submit(analyze, file_path))
+                            for file_path in islice(remaining, MAX_WORKERS))
+            while pending:
+                file_path, future = pending.popleft()
+                # A failed analysis is retried by the task itself, which reports the error
+                analysis = future.result() if future.exception() is None else None
+                next_file = next(remaining, None)
+                if next_file is not None:
+                    pending.append((next_file, executor.submit(analyze, next_file)))
+                run_task(file_path, analysis)
+                del analysis
+                print("-" * 70)
 
     print("\nAll selected files have been processed.")
 